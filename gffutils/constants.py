@@ -54,6 +54,29 @@ default_pragmas = {
     "main.cache_size": 10000,
 }
 
+# Presets for create_db(optimize_for=...), applied on top of the pragmas
+# provided to create_db.
+optimized_pragmas = {
+    # Used only while creating the db. Trades crash safety for speed: with
+    # no syncing to disk, a db whose creation is interrupted may be corrupt.
+    # The journal is kept in memory rather than turned off (journal_mode OFF),
+    # so that a failed transaction can still be rolled back cleanly.
+    "write": {
+        "synchronous": "OFF",
+        "journal_mode": "MEMORY",
+        "main.page_size": 4096,
+        "main.cache_size": 100000,
+        "temp_store": 2,
+        "locking_mode": "EXCLUSIVE",
+    },
+    # Used for the FeatureDB returned by create_db.
+    "read": {
+        "main.cache_size": 100000,
+        "temp_store": 2,
+        "mmap_size": 268435456,
+    },
+}
+
 _keys = [
     "id",
     "seqid",
@@ -53,20 +53,25 @@ class Gene(object):
         self.heights = {"transcript": 0.2, "utrs": 0.5, "cds": 0.9, "full": 1.0}
         self.kwargs = kwargs
         self._transcripts = []
+        by_id = {}
         for transcript in db.children(gene_id, level=1):
             if transcripts is None or transcript.featuretype in transcripts:
                 d = {}
                 d["transcript"] = [transcript]
                 d["utrs"] = []
                 d["cds"] = []
-                for child in db.children(transcript, level=1):
-                    _utrs = []
-                    if child.featuretype in utrs:
-                        d["utrs"].append(child)
-                    if child.featuretype in cds:
-                        d["cds"].append(child)
+                by_id[transcript.id] = d
                 self._transcripts.append(d)
 
+        # Get the children of all transcripts in one query rather than one
+        # query per transcript
+        for transcript_id, child in db.children_bulk(list(by_id), level=1):
+            d = by_id[transcript_id]
+            if child.featuretype in utrs:
+                d["utrs"].append(child)
+            if child.featuretype in cds:
+                d["cds"].append(child)
+
         self.tracks = []
 
         self.ybase = ybase
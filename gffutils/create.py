@@ -48,6 +48,11 @@ def deprecation_handler(kwargs):
 
 
 class _DBCreator(object):
+
+    # Number of features to insert at a time in _populate_from_lines. Larger
+    # batches don't help much.
+    _batchsize = 300
+
     def __init__(
         self,
         data,
@@ -433,6 +438,21 @@ class _DBCreator(object):
     def _populate_from_lines(self, lines):
         raise NotImplementedError
 
+    def _progress_msg(self, lines, i):
+        """
+        Message for verbose output while populating the features table.
+
+        If `lines` can estimate how far through the data it is (see
+        iterators._BaseIterator.percent_done), that is included as well.
+        """
+        msg = "Populating features table and first-order relations: %d features" % i
+        percent_done = getattr(lines, "percent_done", None)
+        if percent_done is not None:
+            perc = percent_done()
+            if perc is not None:
+                msg += " (%d%%)" % perc
+        return msg
+
     def _update_relations(self):
         raise NotImplementedError
 
@@ -558,6 +578,114 @@ class _DBCreator(object):
         for i in result:
             yield i
 
+    def _relations(self, f):
+        """
+        Returns a list of (parent, child, level) tuples for the relations that
+        can be determined from feature `f` alone.
+        """
+        raise NotImplementedError
+
+    def _start_batches(self):
+        """
+        Prepare for inserting features with _add_feature.
+
+        IDs inserted so far are tracked so that a batch never contains an ID
+        that is already in the database. If the database already has features
+        (e.g., when updating), any ID may be a duplicate, so features are
+        inserted one at a time instead.
+        """
+        self._batch = []
+        if self.conn.execute("SELECT 1 FROM features LIMIT 1").fetchone():
+            self._seen_ids = None
+        else:
+            self._seen_ids = set()
+
+    def _add_feature(self, f, cursor):
+        """
+        Add feature `f` to the current batch, inserting the batch once it is
+        full. A feature whose ID has already been seen is inserted by itself,
+        after the features before it, and handled according to the merge
+        strategy.
+        """
+        seen = self._seen_ids
+        if seen is None or f.id in seen:
+            self._flush_batch(cursor)
+            self._insert_or_merge(f, cursor)
+            self._insert_relations([f], cursor)
+        else:
+            self._batch.append(f)
+            if len(self._batch) >= self._batchsize:
+                self._flush_batch(cursor)
+
+        # After _insert_or_merge, so this is any new ID that create_unique made
+        if seen is not None:
+            seen.add(f.id)
+
+    def _flush_batch(self, cursor):
+        """
+        Insert the current batch of features, and their relations, into the
+        database with executemany().
+        """
+        if not self._batch:
+            return
+        cursor.executemany(constants._INSERT, [f.astuple() for f in self._batch])
+        self._insert_relations(self._batch, cursor)
+        self._batch = []
+
+    def _insert_relations(self, features, cursor):
+        # Note the IGNORE, so relationships defined many times in the file
+        # (e.g., the transcript-gene relation on pretty much every line in
+        # a GTF) will only be included once.
+        cursor.executemany(
+            """
+            INSERT OR IGNORE INTO relations (parent, child, level)
+            VALUES (?, ?, ?)
+            """,
+            [r for f in features for r in self._relations(f)],
+        )
+
+    def _insert_or_merge(self, f, cursor):
+        """
+        Insert a single feature, handling a duplicate ID according to the
+        merge strategy.
+        """
+        try:
+            self._insert(f, cursor)
+        except sqlite3.IntegrityError:
+            fixed, final_strategy = self._do_merge(f, self.merge_strategy)
+            if final_strategy == "merge":
+                cursor.execute(
+                    """
+                    UPDATE features SET attributes = ?
+                    WHERE id = ?
+                    """,
+                    (helpers._jsonify(fixed.attributes), fixed.id),
+                )
+
+                # For any additional fields we're merging, update those as
+                # well.
+                if self.force_merge_fields:
+                    _set_clause = ", ".join(
+                        ["%s = ?" % field for field in self.force_merge_fields]
+                    )
+                    values = [
+                        getattr(fixed, field) for field in self.force_merge_fields
+                    ] + [fixed.id]
+                    cursor.execute(
+                        """
+                        UPDATE features SET %s
+                        WHERE id = ?
+                        """
+                        % _set_clause,
+                        tuple(values),
+                    )
+
+            elif final_strategy == "replace":
+                self._replace(f, cursor)
+
+            elif final_strategy == "create_unique":
+                self._insert(f, cursor)
+
     def _insert(self, feature, cursor):
         """
         Insert a feature into the database.
@@ -592,17 +720,13 @@ class _GFFDBCreator(_DBCreator):
     def _populate_from_lines(self, lines):
         c = self.conn.cursor()
         self._drop_indexes()
-        last_perc = 0
         logger.info("Populating features")
-        msg = "Populating features table and first-order relations: " "%d features\r"
 
-        # c.executemany() was not as much of an improvement as I had expected.
-        #
-        # Compared to a benchmark of doing each insert separately:
-        # executemany using a list of dicts to iterate over is ~15% slower
-        # executemany using a list of tuples to iterate over is ~8% faster
+        # Features are inserted in batches with executemany(), which avoids
+        # per-row statement overhead; see _add_feature for how duplicate IDs
+        # are handled.
         features_seen = None
-        _features, _relations = [], []
+        self._start_batches()
         for i, f in enumerate(lines):
             features_seen = i
 
@@ -610,67 +734,24 @@ class _GFFDBCreator(_DBCreator):
 
             if self.verbose:
                 if i % 1000 == 0:
-                    sys.stderr.write(msg % i)
+                    sys.stderr.write(self._progress_msg(lines, i) + "\r")
                     sys.stderr.flush()
 
-            # TODO: handle ID creation here...should be combined with the
-            # INSERT below (that is, don't IGNORE below but catch the error and
-            # re-try with a new ID).  However, is this doable with an
-            # execute-many?
             f.id = self._id_handler(f)
-            try:
-                self._insert(f, c)
-            except sqlite3.IntegrityError:
-                fixed, final_strategy = self._do_merge(f, self.merge_strategy)
-                if final_strategy == "merge":
-                    c.execute(
-                        """
-                        UPDATE features SET attributes = ?
-                        WHERE id = ?
-                        """,
-                        (helpers._jsonify(fixed.attributes), fixed.id),
-                    )
-
-                    # For any additional fields we're merging, update those as
-                    # well.
-                    if self.force_merge_fields:
-                        _set_clause = ", ".join(
-                            ["%s = ?" % field for field in self.force_merge_fields]
-                        )
-                        values = [
-                            getattr(fixed, field) for field in self.force_merge_fields
-                        ] + [fixed.id]
-                        c.execute(
-                            """
-                            UPDATE features SET %s
-                            WHERE id = ?
-                            """
-                            % _set_clause,
-                            tuple(values),
-                        )
-
-                elif final_strategy == "replace":
-                    self._replace(f, c)
-
-                elif final_strategy == "create_unique":
-                    self._insert(f, c)
-
-            if "Parent" in f.attributes:
-                for parent in f.attributes["Parent"]:
-                    c.execute(
-                        """
-                        INSERT OR IGNORE INTO relations VALUES
-                        (?, ?, 1)
-                        """,
-                        (parent, f.id),
-                    )
+            self._add_feature(f, c)
+        self._flush_batch(c)
 
         if features_seen is None:
             raise EmptyInputError("No lines parsed -- was an empty file provided?")
 
         self.conn.commit()
         if self.verbose:
-            logger.info(msg % i)
+            logger.info(self._progress_msg(lines, i))
+
+    def _relations(self, f):
+        if "Parent" in f.attributes:
+            return [(parent, f.id, 1) for parent in f.attributes["Parent"]]
+        return []
 
     def _update_relations(self):
         logger.info("Updating relations")
@@ -745,16 +826,14 @@ class _GTFDBCreator(_DBCreator):
         super(_GTFDBCreator, self).__init__(*args, **kwargs)
 
     def _populate_from_lines(self, lines):
-        msg = "Populating features table and first-order relations: %d " "features\r"
-
         c = self.conn.cursor()
 
         # Only check this many features to see if it's a gene or transcript and
         # issue the appropriate warning.
         gene_and_transcript_check_limit = 1000
 
-        last_perc = 0
         lines_seen = 0
+        self._start_batches()
         for i, f in enumerate(lines):
 
             # See issues #48 and #20.
@@ -780,84 +859,39 @@ class _GTFDBCreator(_DBCreator):
             if self.verbose:
 
                 if i % 1000 == 0:
-                    sys.stderr.write(msg % i)
+                    sys.stderr.write(self._progress_msg(lines, i) + "\r")
                     sys.stderr.flush()
 
             f.id = self._id_handler(f)
-
-            # Insert the feature itself...
-            try:
-                self._insert(f, c)
-            except sqlite3.IntegrityError:
-                fixed, final_strategy = self._do_merge(f, self.merge_strategy)
-                if final_strategy == "merge":
-                    c.execute(
-                        """
-                        UPDATE features SET attributes = ?
-                        WHERE id = ?
-                        """,
-                        (helpers._jsonify(fixed.attributes), fixed.id),
-                    )
-                    # For any additional fields we're merging, update those as
-                    # well.
-                    if self.force_merge_fields:
-                        _set_clause = ", ".join(
-                            ["%s = ?" % field for field in self.force_merge_fields]
-                        )
-                        values = [
-                            getattr(fixed, field) for field in self.force_merge_fields
-                        ] + [fixed.id]
-                        c.execute(
-                            """
-                            UPDATE features SET %s
-                            WHERE id = ?
-                            """
-                            % _set_clause,
-                            values,
-                        )
-                elif final_strategy == "replace":
-                    self._replace(f, c)
-                elif final_strategy == "create_unique":
-                    self._insert(f, c)
-
-            # For an on-spec GTF file,
-            # self.transcript_key = "transcript_id"
-            # self.gene_key = "gene_id"
-            relations = []
-            parent = None
-            grandparent = None
-            if (
-                self.transcript_key in f.attributes
-                and f.attributes[self.transcript_key]
-            ):
-                parent = f.attributes[self.transcript_key][0]
-                relations.append((parent, f.id, 1))
-
-            if self.gene_key in f.attributes:
-                grandparent = f.attributes[self.gene_key]
-                if len(grandparent) > 0:
-                    grandparent = grandparent[0]
-                    relations.append((grandparent, f.id, 2))
-                    if parent is not None:
-                        relations.append((grandparent, parent, 1))
-
-            # Note the IGNORE, so relationships defined many times in the file
-            # (e.g., the transcript-gene relation on pretty much every line in
-            # a GTF) will only be included once.
-            c.executemany(
-                """
-                INSERT OR IGNORE INTO relations (parent, child, level)
-                VALUES (?, ?, ?)
-                """,
-                relations,
-            )
+            self._add_feature(f, c)
+        self._flush_batch(c)
 
         if lines_seen == 0:
             raise ValueError("No lines parsed -- was an empty file provided?")
         logger.info("Committing changes")
         self.conn.commit()
         if self.verbose:
-            logger.info(msg % i)
+            logger.info(self._progress_msg(lines, i))
+
+    def _relations(self, f):
+        # For an on-spec GTF file,
+        # self.transcript_key = "transcript_id"
+        # self.gene_key = "gene_id"
+        relations = []
+        parent = None
+        grandparent = None
+        if self.transcript_key in f.attributes and f.attributes[self.transcript_key]:
+            parent = f.attributes[self.transcript_key][0]
+            relations.append((parent, f.id, 1))
+
+        if self.gene_key in f.attributes:
+            grandparent = f.attributes[self.gene_key]
+            if len(grandparent) > 0:
+                grandparent = grandparent[0]
+                relations.append((grandparent, f.id, 2))
+                if parent is not None:
+                    relations.append((grandparent, parent, 1))
+        return relations
 
     def _update_relations(self):
 
@@ -1114,6 +1148,7 @@ def create_db(
     text_factory=str,
     force_merge_fields=None,
     pragmas=constants.default_pragmas,
+    optimize_for=None,
     sort_attribute_values=False,
     dialect=None,
     _keep_tempfiles=False,
@@ -1205,9 +1240,8 @@ def create_db(
         Report percent complete and other feedback on how the db creation is
         progressing.
 
-        In order to report percent complete, the entire file needs to be read
-        once to see how many items there are; for large files you may want to
-        use `verbose=False` to avoid this.
+        Percent complete is estimated from the current position in the input
+        file, so it is only reported when `data` is a filename.
 
     checklines : int
 
@@ -1329,6 +1363,18 @@ def create_db(
         defaults are stored in constants.default_pragmas, which can be used as
         a template for supplying a custom dictionary.
 
+    optimize_for : None, "write", "read", or "balanced"
+        Apply one of the pragma presets in constants.optimized_pragmas on top
+        of `pragmas`. If "write", then while the database is being created
+        the rollback journal is kept in memory (journal_mode=MEMORY, not
+        OFF), there is no syncing to disk (synchronous=OFF), the page cache
+        and temporary tables are larger and in memory, and the database is
+        locked exclusively. This is faster, but the database may be corrupt
+        if creation is interrupted. The returned FeatureDB goes back to
+        `pragmas` (and releases the lock). If "read", the returned FeatureDB
+        uses a larger cache and memory-mapped I/O. "balanced" does both.
+        Default is None, which uses `pragmas` as-is.
+
     sort_attribute_values : bool
         All features returned from the database will have their attribute
         values sorted.  Typically this is only useful for testing, since this
@@ -1350,6 +1396,18 @@ def create_db(
     # Check if any older kwargs made it in
     deprecation_handler(kwargs)
 
+    if optimize_for not in (None, "write", "read", "balanced"):
+        raise ValueError(
+            "optimize_for must be one of None, 'write', 'read', or 'balanced'; "
+            "got %r" % optimize_for
+        )
+    create_pragmas = db_pragmas = pragmas
+    if optimize_for in ("write", "balanced"):
+        create_pragmas = dict(pragmas, **constants.optimized_pragmas["write"])
+        db_pragmas = dict(db_pragmas, locking_mode="NORMAL")
+    if optimize_for in ("read", "balanced"):
+        db_pragmas = dict(db_pragmas, **constants.optimized_pragmas["read"])
+
     kwargs = dict((i, _locals[i]) for i in constants._iterator_kwargs)
 
     # First construct an iterator so that we can identify the file format.
@@ -1396,6 +1454,7 @@ def create_db(
 
     kwargs.update(**add_kwargs)
     kwargs["dialect"] = dialect
+    kwargs["pragmas"] = create_pragmas
     c = cls(**kwargs)
 
     c.create()
@@ -1403,7 +1462,7 @@ def create_db(
         db = interface.FeatureDB(
             c.conn,
             keep_order=keep_order,
-            pragmas=pragmas,
+            pragmas=db_pragmas,
             sort_attribute_values=sort_attribute_values,
             text_factory=text_factory,
         )
@@ -1411,7 +1470,7 @@ def create_db(
         db = interface.FeatureDB(
             c,
             keep_order=keep_order,
-            pragmas=pragmas,
+            pragmas=db_pragmas,
             sort_attribute_values=sort_attribute_values,
             text_factory=text_factory,
         )
@@ -1,3 +1,5 @@
+import operator
+
 from pyfaidx import Fasta
 import simplejson as json
 from gffutils import constants
@@ -23,6 +25,9 @@ _position_lookup = dict(
     )
 )
 
+# All fields but attributes, in GFF order
+_gff_fields = operator.attrgetter(*constants._gffkeys[:-1])
+
 
 class Feature(object):
     def __init__(
@@ -258,7 +263,7 @@ class Feature(object):
     def __unicode__(self):
 
         # All fields but attributes (and extra).
-        items = [getattr(self, k) for k in constants._gffkeys[:-1]]
+        items = list(_gff_fields(self))
 
         # Handle start/stop, which are either None or int
         if items[3] is None:
@@ -291,6 +296,10 @@ class Feature(object):
         return hash(str(self))
 
     def __eq__(self, other):
+        # Skip reconstructing the attributes when comparing a feature to
+        # itself
+        if self is other:
+            return True
         return str(self) == str(other)
 
     def __ne__(self, other):
@@ -1,4 +1,3 @@
-import copy
 import sys
 import os
 import simplejson as json
@@ -378,21 +377,21 @@ def merge_attributes(attr1, attr2, numeric_sort=False):
     dict
     """
 
-    new_d = copy.deepcopy(attr1)
-    new_d.update(copy.deepcopy(attr2))
-
-    # all of attr2 key : values just overwrote attr1, fix it
-    for k, v in new_d.items():
-        if not isinstance(v, list):
-            new_d[k] = [v]
-
-    for k, v in attr1.items():
-        if k in attr2:
+    # Union the values for each key into a new set (so nothing is shared with
+    # the inputs). Keys from attr1 come first, followed by any new keys from
+    # attr2.
+    new_d = {}
+    for attrs in (attr1, attr2):
+        for k, v in attrs.items():
             if not isinstance(v, list):
                 v = [v]
-            new_d[k].extend(v)
+            if k in new_d:
+                new_d[k].update(v)
+            else:
+                new_d[k] = set(v)
+
     if not numeric_sort:
-        return dict((k, sorted(set(v))) for k, v in new_d.items())
+        return {k: sorted(v) for k, v in new_d.items()}
 
     final_d = {}
     for key, values in new_d.items():
@@ -409,11 +408,11 @@ def merge_attributes(attr1, attr2, numeric_sort=False):
             # numerically-sorted strings,
             #
             #   ['4.2', '5']
-            sorted_numeric = sorted([(float(v), v) for v in set(values)])
+            sorted_numeric = sorted([(float(v), v) for v in values])
             new_values = [i[1] for i in sorted_numeric]
         except ValueError:
             # E.g., not everything was able to be converted into a number
-            new_values = sorted(set(values))
+            new_values = sorted(values)
         final_d[key] = new_values
     return final_d
 
@@ -574,11 +573,14 @@ def canonical_transcripts(db, fasta_filename):
 ##
 ## TODO: move clean_gff here?
 ##
-def get_gff_db(gff_fname, ext=".db"):
+def get_gff_db(gff_fname, ext=".db", in_memory=False):
     """
     Get db for GFF file. If the database has a .db file,
     load that. Otherwise, create a named temporary file,
     serialize the db to that, and return the loaded database.
+
+    If `in_memory` is True, a new database is built in memory instead
+    and nothing is written to disk.
     """
     if not os.path.isfile(gff_fname):
         # Not sure how we should deal with errors normally in
@@ -594,14 +596,15 @@ def get_gff_db(gff_fname, ext=".db"):
     ## NOTE: Ryan must have a good scheme for dealing with this
     ## since pybedtools does something similar under the hood, i.e.
     ## creating temporary files as needed without over proliferation
-    db_fname = tempfile.NamedTemporaryFile(delete=False)
+    if in_memory:
+        db_fname = ":memory:"
+    else:
+        db_fname = tempfile.NamedTemporaryFile(delete=False).name
     # Create the database for the gff file (suppress output
     # when using function internally)
     print("Creating db for %s" % (gff_fname))
     t1 = time.time()
-    db = gffutils.create_db(
-        gff_fname, db_fname.name, merge_strategy="merge", verbose=False
-    )
+    db = gffutils.create_db(gff_fname, db_fname, merge_strategy="merge", verbose=False)
     t2 = time.time()
     print("  - Took %.2f seconds" % (t2 - t1))
     return db
@@ -102,6 +102,7 @@ class FeatureDB(object):
         pragmas=constants.default_pragmas,
         sort_attribute_values=False,
         text_factory=str,
+        feature_cache_size=0,
     ):
         """
         Connect to a database created by :func:`gffutils.create_db`.
@@ -147,6 +148,18 @@ class FeatureDB(object):
             These can be changed later using the :meth:`FeatureDB.set_pragmas`
             method.
 
+        feature_cache_size : int
+            If greater than zero, keep up to this many of the most recently
+            looked-up features' database rows in memory so that repeated
+            lookups of the same ID (e.g., ``db[id]``) skip the query. This
+            counts rows, not pages, and is unrelated to SQLite's own
+            ``cache_size`` pragma (see `pragmas`). A new Feature is still
+            created for each lookup. The cache is cleared whenever this
+            object modifies the database; if the database is modified some
+            other way (e.g., via another connection or directly via
+            `FeatureDB.conn`), call :meth:`FeatureDB.clear_cache`. Default is
+            0, which disables the cache.
+
         Notes
         -----
 
@@ -186,6 +199,8 @@ class FeatureDB(object):
         self.default_encoding = default_encoding
         self.keep_order = keep_order
         self.sort_attribute_values = sort_attribute_values
+        self.feature_cache_size = feature_cache_size
+        self._cache = collections.OrderedDict()
         c = self.conn.cursor()
 
         # Load some meta info
@@ -279,9 +294,24 @@ class FeatureDB(object):
                 results.append(i)
         return "\n".join(results)
 
+    def clear_cache(self):
+        """
+        Empty the cache of looked-up rows enabled by the
+        `feature_cache_size` argument.
+        """
+        self._cache.clear()
+
     def __getitem__(self, key):
         if isinstance(key, Feature):
             key = key.id
+        if self.feature_cache_size > 0:
+            try:
+                results = self._cache[key]
+            except KeyError:
+                pass
+            else:
+                self._cache.move_to_end(key)
+                return self._feature_returner(**results)
         c = self.conn.cursor()
         try:
             c.execute(constants._SELECT + " WHERE id = ?", (key,))
@@ -294,8 +324,71 @@ class FeatureDB(object):
         # TODO: raise error if more than one key is found
         if results is None:
             raise FeatureNotFoundError(key)
+        if self.feature_cache_size > 0:
+            self._cache[key] = results
+            if len(self._cache) > self.feature_cache_size:
+                self._cache.popitem(last=False)
         return self._feature_returner(**results)
 
+    def __contains__(self, key):
+        """
+        Check whether a feature is in the database, e.g. ``"gene1" in db``,
+        without building a Feature object.
+        """
+        if isinstance(key, Feature):
+            key = key.id
+        if key in self._cache:
+            return True
+        c = self.conn.cursor()
+        try:
+            c.execute("SELECT 1 FROM features WHERE id = ? LIMIT 1", (key,))
+        except sqlite3.ProgrammingError:
+            c.execute(
+                "SELECT 1 FROM features WHERE id = ? LIMIT 1",
+                (key.decode(self.default_encoding),),
+            )
+        return c.fetchone() is not None
+
+    def features_by_id(self, ids, batchsize=500):
+        """
+        Look up many features by ID at once.
+
+        Equivalent to ``(db[i] for i in ids)``, but uses a single query for
+        each batch of `batchsize` ids rather than one query per id.
+
+        Parameters
+        ----------
+
+        ids : iterable of strings or Feature objects
+
+        batchsize : int
+
+            Number of ids to look up in each query. SQLite limits the number
+            of parameters in a single query, so this should be kept well
+            under 999.
+
+        Returns
+        -------
+        A generator object that yields :class:`Feature` objects in the same
+        order as `ids`.  Raises :class:`FeatureNotFoundError` upon reaching
+        an id that is not in the database.
+        """
+        ids = [i.id if isinstance(i, Feature) else i for i in ids]
+        for start in range(0, len(ids), batchsize):
+            batch = ids[start : start + batchsize]
+            unique = set(batch)
+            c = self._execute(
+                constants._SELECT + " WHERE id IN (%s)" % ",".join("?" * len(unique)),
+                unique,
+            )
+            found = {i["id"]: i for i in c}
+            for key in batch:
+                try:
+                    results = found[key]
+                except KeyError:
+                    raise FeatureNotFoundError(key)
+                yield self._feature_returner(**results)
+
     def count_features_of_type(self, featuretype=None):
         """
         Simple count of features.
@@ -561,6 +654,183 @@ class FeatureDB(object):
             completely_within=completely_within,
         )
 
+    def children_bulk(self, ids, level=None, featuretype=None, batchsize=500):
+        """
+        Return children of many features at once.
+
+        Equivalent to calling :meth:`FeatureDB.children` on each of `ids`, but
+        uses a single query for each batch of `batchsize` ids rather than one
+        query per id.
+
+        Parameters
+        ----------
+
+        ids : iterable of strings or Feature objects
+
+        level : None or int
+
+            If `level=None` (default), then return all children regardless
+            of level.  If `level` is an integer, then constrain to just that
+            level.
+
+        featuretype : string or tuple
+
+            If not None, then restrict children to only those of this
+            featuretype (or featuretypes, if a tuple).
+
+        batchsize : int
+
+            Number of ids to look up in each query. SQLite limits the number
+            of parameters in a single query, so this should be kept well
+            under 999.
+
+        Returns
+        -------
+        A generator object that yields (parent_id, :class:`Feature`) tuples,
+        grouped by parent and then sorted by child start position.
+        """
+        ids = [i.id if isinstance(i, Feature) else i for i in ids]
+        for start in range(0, len(ids), batchsize):
+            batch = ids[start : start + batchsize]
+            for i in self._parent_child_pairs(
+                "relations.parent IN (%s)" % ",".join("?" * len(batch)),
+                batch,
+                level=level,
+                featuretype=featuretype,
+            ):
+                yield i
+
+    def parents_bulk(self, ids, level=None, featuretype=None, batchsize=500):
+        """
+        Return parents of many features at once.
+
+        Equivalent to calling :meth:`FeatureDB.parents` on each of `ids`, but
+        uses a single query for each batch of `batchsize` ids rather than one
+        query per id.
+
+        Parameters
+        ----------
+
+        ids : iterable of strings or Feature objects
+
+        level : None or int
+
+            If `level=None` (default), then return all parents regardless
+            of level.  If `level` is an integer, then constrain to just that
+            level.
+
+        featuretype : string or tuple
+
+            If not None, then restrict parents to only those of this
+            featuretype (or featuretypes, if a tuple).
+
+        batchsize : int
+
+            Number of ids to look up in each query. SQLite limits the number
+            of parameters in a single query, so this should be kept well
+            under 999.
+
+        Returns
+        -------
+        A generator object that yields (child_id, :class:`Feature`) tuples,
+        grouped by child and then sorted by parent start position.
+        """
+        ids = [i.id if isinstance(i, Feature) else i for i in ids]
+        for start in range(0, len(ids), batchsize):
+            batch = ids[start : start + batchsize]
+            for i in self._parent_child_pairs(
+                "relations.child IN (%s)" % ",".join("?" * len(batch)),
+                batch,
+                level=level,
+                featuretype=featuretype,
+                parents=True,
+            ):
+                yield i
+
+    def children_of_type(self, parent_featuretype, level=None, featuretype=None):
+        """
+        Return children of all features of a particular featuretype.
+
+        Equivalent to calling :meth:`FeatureDB.children` on each feature
+        returned by ``features_of_type(parent_featuretype)``, but uses
+        a single query.
+
+        Parameters
+        ----------
+
+        parent_featuretype : string
+
+            Featuretype of the parents, e.g., "gene"
+
+        level : None or int
+
+            If `level=None` (default), then return all children regardless
+            of level.  If `level` is an integer, then constrain to just that
+            level.
+
+        featuretype : string or tuple
+
+            If not None, then restrict children to only those of this
+            featuretype (or featuretypes, if a tuple).
+
+        Returns
+        -------
+        A generator object that yields (parent_id, :class:`Feature`) tuples,
+        grouped by parent and then sorted by child start position. Parents
+        without any children are not included.
+        """
+        return self._parent_child_pairs(
+            "relations.parent IN (SELECT id FROM features WHERE featuretype = ?)",
+            [parent_featuretype],
+            level=level,
+            featuretype=featuretype,
+        )
+
+    def _parent_child_pairs(
+        self, clause, args, level=None, featuretype=None, parents=False
+    ):
+        """
+        Yields (parent_id, child Feature) tuples for relations whose parent
+        matches `clause`, which uses `args` as its parameters.
+
+        If `parents` is True, then instead yields (child_id, parent Feature)
+        tuples for relations whose child matches `clause`.
+        """
+        if parents:
+            key, other = "child", "parent"
+        else:
+            key, other = "parent", "child"
+
+        extra = []
+        args = list(args)
+        if level is not None:
+            extra.append("relations.level = ?")
+            args.append(level)
+        if featuretype is not None:
+            if isinstance(featuretype, str):
+                featuretype = (featuretype,)
+            extra.append(
+                "features.featuretype IN (%s)" % ",".join("?" * len(featuretype))
+            )
+            args.extend(featuretype)
+
+        query = " ".join(
+            [
+                constants._SELECT.replace(
+                    "SELECT", "SELECT DISTINCT relations.%s AS key_id," % key, 1
+                ),
+                "JOIN relations ON relations.%s = features.id" % other,
+                "WHERE",
+                clause,
+            ]
+            + ["AND " + i for i in extra]
+            + ["ORDER BY relations.%s, features.start" % key]
+        )
+        for i in self._execute(query, args):
+            d = dict(i)
+            key_id = d.pop("key_id")
+            yield key_id, self._feature_returner(**d)
+
     def _execute(self, query, args):
         self._last_query = query
         self._last_args = args
@@ -588,6 +858,8 @@ class FeatureDB(object):
         -------
         A sqlite3.Cursor object that can be iterated over.
         """
+        # The query could modify the database
+        self.clear_cache()
         c = self.conn.cursor()
         return c.execute(query)
 
@@ -735,17 +1007,26 @@ class FeatureDB(object):
         if end is not None:
             end = int(end)
 
-        # See #129
-        if start and end and not completely_within:
+        # See #129.
+        #
+        # Note that start and end were swapped above. For the usual case of
+        # a region that starts before it ends, a feature overlaps it exactly
+        # when it starts before the region's end and ends after the region's
+        # start. Keeping the clause that simple (and using placeholders) lets
+        # sqlite use the (seqid, start, end) index for a range scan rather
+        # than scanning the whole table.
+        if start and end and not completely_within and end < start:
+            position_clause.append("start <= ? AND end >= ?")
+            args.extend([start, end])
+        elif start and end and not completely_within:
             position_clause.append(
                 """(
-                ({region_start} <= start AND {region_end} >= start) OR
-                ({region_start} >= start AND {region_end} <= end) OR
-                ({region_start} <= end AND {region_end} >= end)
-            )""".format(
-                    region_start=start, region_end=end
-                )
+                (? <= start AND ? >= start) OR
+                (? >= start AND ? <= end) OR
+                (? <= end AND ? >= end)
+            )"""
             )
+            args.extend([start, end] * 3)
         else:
             if start:
                 position_clause.append("start %s ?" % start_op)
@@ -756,18 +1037,31 @@ class FeatureDB(object):
 
         position_clause = " AND ".join(position_clause)
 
-        # Only use bins if we have defined boundaries and completely_within is
-        # True. Otherwise you can't know how far away a feature stretches
-        # (which means bins are not computable ahead of time)
+        # Use bins to narrow down the candidate features if we have defined
+        # boundaries. Each feature is stored with the smallest bin that
+        # completely contains it, so anything within -- or overlapping -- the
+        # region must be in one of the bins overlapping the region. Features
+        # too large for the binning scheme are all in bin 1, which is always
+        # included.
+        #
+        # Overlap queries only use bins for the usual case handled above (with
+        # start and end swapped), and only when the region itself is within
+        # the binning scheme.
         _bin_clause = ""
+        _bin_range = None
         if (start is not None) and (end is not None) and completely_within:
             if start <= bins.MAX_CHROM_SIZE and end <= bins.MAX_CHROM_SIZE:
-                _bins = list(bins.bins(start, end, one=False))
-                # See issue #45
-                if len(_bins) < 900:
-                    _bin_clause = " or ".join(["bin = ?" for _ in _bins])
-                    _bin_clause = "AND ( %s )" % _bin_clause
-                    args += _bins
+                _bin_range = (start, end)
+        elif start and end and end < start:
+            if end >= 1 and start < bins.MAX_CHROM_SIZE:
+                _bin_range = (end, start)
+        if _bin_range is not None:
+            _bins = list(bins.bins(*_bin_range, one=False))
+            # See issue #45
+            if len(_bins) < 900:
+                _bin_clause = " or ".join(["bin = ?" for _ in _bins])
+                _bin_clause = "AND ( %s )" % _bin_clause
+                args += _bins
 
         query = " ".join([constants._SELECT, "WHERE ", position_clause, _bin_clause])
 
@@ -1008,6 +1302,7 @@ class FeatureDB(object):
             if isinstance(self.dbfn, str):
                 shutil.copy2(self.dbfn, self.dbfn + ".bak")
 
+        self.clear_cache()
         c = self.conn.cursor()
         query1 = """
         DELETE FROM features WHERE id = ?
@@ -1110,6 +1405,7 @@ class FeatureDB(object):
         else:
             raise ValueError
 
+        self.clear_cache()
         db._populate_from_lines(data)
         db._update_relations()
 
@@ -1180,6 +1476,7 @@ class FeatureDB(object):
         return self
 
     def _update(self, feature, cursor):
+        self.clear_cache()
         values = [list(feature.astuple()) + [feature.id]]
         cursor.execute(constants._UPDATE, *tuple(values))
 
@@ -1187,6 +1484,7 @@ class FeatureDB(object):
         """
         Insert a feature into the database.
         """
+        self.clear_cache()
         try:
             cursor.execute(constants._INSERT, feature.astuple())
         except sqlite3.ProgrammingError:
@@ -8,6 +8,7 @@ is and therefore decide whether the data is GFF or GTF format, which is
 important for figuring out how to construct the database.
 
 """
+import io
 import os
 import tempfile
 import itertools
@@ -56,6 +57,9 @@ class _BaseIterator(object):
 
             - keep track of directives
 
+            - estimate percent complete during iteration where possible; see
+              iter_with_progress()
+
         """
         self.data = data
         self.checklines = checklines
@@ -101,12 +105,36 @@ class _BaseIterator(object):
     def _directive_handler(self, directive):
         self.directives.append(directive[2:])
 
+    def percent_done(self):
+        """
+        Estimated percent complete of the current iteration, or None if it
+        cannot be determined for this kind of data.
+        """
+        return None
+
+    def iter_with_progress(self):
+        """
+        Like iterating over this object directly, but yields (percent, feature)
+        tuples where `percent` is the value of percent_done() at the time the
+        feature was yielded.
+
+        The estimate comes from the current offset into the underlying file so
+        it costs nothing extra up front -- no separate pass through the data
+        is needed to count lines.
+        """
+        for i in self:
+            yield self.percent_done(), i
+
 
 class _FileIterator(_BaseIterator):
     """
     Subclass for iterating over features provided as a filename
     """
 
+    # Set while iterating, and used for estimating percent complete.
+    _fh = None
+    _size = None
+
     def peek(self, n):
         initial = []
         for i, feature in enumerate(self._custom_iter()):
@@ -117,16 +145,36 @@ class _FileIterator(_BaseIterator):
 
     def open_function(self, data):
         data = os.path.expanduser(data)
+        self._size = os.path.getsize(data)
         if data.endswith(".gz"):
             import gzip
 
             return gzip.open(data)
-        return open(data)
+
+        # Same as open(data), but keeps a handle on the underlying binary file
+        # so that percent_done can use its tell() while iterating over lines.
+        return io.TextIOWrapper(open(data, "rb"), newline=None)
+
+    def percent_done(self):
+        fh = self._fh
+        if fh is None or not self._size or fh.closed:
+            return None
+
+        # For plain files, use the offset into the binary file (the text
+        # wrapper's own tell() can't be used during iteration). For gzipped
+        # files, use the offset into the compressed file so it's comparable
+        # to the size of the file on disk.
+        if isinstance(fh, io.TextIOWrapper):
+            fh = fh.buffer
+        else:
+            fh = fh.fileobj
+        return 100.0 * fh.tell() / self._size
 
     def _custom_iter(self):
         self.directives = []
         valid_lines = 0
         with self.open_function(self.data) as fh:
+            self._fh = fh
             for i, line in enumerate(fh):
                 if isinstance(line, bytes):
                     line = line.decode("utf-8")
@@ -154,6 +202,10 @@ class _UrlIterator(_FileIterator):
     Subclass for iterating over features provided as a URL
     """
 
+    def percent_done(self):
+        # The response is streamed, so there is no file size to compare with
+        return None
+
     @contextmanager
     def open_function(self, data):
         response = urlopen(data)
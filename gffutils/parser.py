@@ -2,6 +2,7 @@
 
 import re
 import copy
+import functools
 import collections
 import urllib
 from gffutils import constants
@@ -100,10 +101,17 @@ def _reconstruct(keyvals, dialect, keep_order=False, sort_attribute_values=False
         raise AttributeStringError()
     if not keyvals:
         return ""
-    parts = []
+
+    # This is called for every feature that's printed, so look up the dialect
+    # values just once here rather than in the loops below.
+    fmt = dialect["fmt"]
+    multival_sep = dialect["multival separator"]
+    kv_sep = dialect["keyval separator"]
+    field_sep = dialect["field separator"]
+    quoted = dialect["quoted GFF2 values"]
 
     # Re-encode when reconstructing attributes
-    if constants.ignore_url_escape_characters or dialect["fmt"] != "gff3":
+    if constants.ignore_url_escape_characters or fmt != "gff3":
         attributes = keyvals
     else:
         attributes = {}
@@ -135,34 +143,31 @@ def _reconstruct(keyvals, dialect, keep_order=False, sort_attribute_values=False
     if keep_order:
         items.sort(key=sort_key)
 
-    for key, val in items:
-
+    def _format_part(key, val):
         # Multival sep is usually a comma:
         if val:
             if sort_attribute_values:
                 val = sorted(val)
 
-            val_str = dialect["multival separator"].join(val)
+            val_str = multival_sep.join(val)
 
             if val_str:
 
                 # Surround with quotes if needed
-                if dialect["quoted GFF2 values"]:
-                    val_str = '"%s"' % val_str
+                if quoted:
+                    val_str = '"' + val_str + '"'
 
                 # Typically "=" for GFF3 or " " otherwise
-                part = dialect["keyval separator"].join([key, val_str])
-            else:
-                part = key
-        else:
-            if dialect["fmt"] == "gtf":
-                part = dialect["keyval separator"].join([key, '""'])
-            else:
-                part = key
-        parts.append(part)
+                return key + kv_sep + val_str
+            return key
+        if fmt == "gtf":
+            return key + kv_sep + '""'
+        return key
+
+    parts = [_format_part(key, val) for key, val in items]
 
     # Typically ";" or "; "
-    parts_str = dialect["field separator"].join(parts)
+    parts_str = field_sep.join(parts)
 
     # Sometimes need to add this
     if dialect["trailing semicolon"]:
@@ -171,6 +176,24 @@ def _reconstruct(keyvals, dialect, keep_order=False, sort_attribute_values=False
     return parts_str
 
 
+def _unquote_quals(keyval_str, quals, dialect):
+    """
+    Handles the unquoting (decoding) of percent-encoded characters.
+
+    See notes on encoding/decoding above.
+    """
+    # Nothing can be percent-encoded if there's no "%" anywhere in the
+    # original string, which is by far the most common case. Checking once
+    # here avoids calling unquote() on every single value.
+    if "%" not in keyval_str:
+        return quals
+    if not constants.ignore_url_escape_characters and dialect["fmt"] == "gff3":
+        for key, vals in quals.items():
+            unquoted = [urllib.parse.unquote(v) for v in vals]
+            quals[key] = unquoted
+    return quals
+
+
 # TODO:
 # Cythonize -- profiling shows that the bulk of the time is spent on this
 # function...
@@ -188,92 +211,86 @@ def _split_keyvals(keyval_str, dialect=None):
     Otherwise, use the provided dialect (and return it at the end).
     """
 
-    def _unquote_quals(quals, dialect):
-        """
-        Handles the unquoting (decoding) of percent-encoded characters.
-
-        See notes on encoding/decoding above.
-        """
-        if not constants.ignore_url_escape_characters and dialect["fmt"] == "gff3":
-            for key, vals in quals.items():
-                unquoted = [urllib.parse.unquote(v) for v in vals]
-                quals[key] = unquoted
-        return quals
-
-    infer_dialect = False
-    if dialect is None:
-        # Make a copy of default dialect so it can be modified as needed
-        dialect = copy.copy(constants.dialect)
-        infer_dialect = True
     from gffutils import feature
 
-    quals = feature.dict_class()
     if not keyval_str:
+        if dialect is None:
+            dialect = copy.copy(constants.dialect)
+        return feature.dict_class(), dialect
+
+    # Inferring the dialect is the expensive part, and the same attribute
+    # strings tend to come up over and over (e.g., when every feature is
+    # created from a string), so the results are cached. The cached values are
+    # immutable; copy them into fresh objects that callers are free to modify.
+    if dialect is None:
+        frozen_quals, frozen_dialect = _infer_keyvals(
+            keyval_str, constants.ignore_url_escape_characters
+        )
+        quals = feature.dict_class()
+        for key, vals in frozen_quals:
+            quals[key] = list(vals)
+        dialect = dict(frozen_dialect)
+        dialect["order"] = list(dialect["order"])
         return quals, dialect
 
-    # If a dialect was provided, then use that directly.
-    if not infer_dialect:
-        if dialect["trailing semicolon"]:
-            keyval_str = keyval_str.rstrip(";")
+    # Otherwise a dialect was provided, so use that directly. This path is
+    # taken for every line of a file once the dialect is known, so look up the
+    # dialect values just once.
+    quals = feature.dict_class()
+    kvsep = dialect["keyval separator"]
+    quoted = dialect["quoted GFF2 values"]
+    strip = dialect["fmt"] != "gff3"
 
-        parts = keyval_str.split(dialect["field separator"])
+    if dialect["trailing semicolon"]:
+        keyval_str = keyval_str.rstrip(";")
 
-        kvsep = dialect["keyval separator"]
-        if dialect["leading semicolon"]:
-            pieces = []
-            for p in parts:
-                if p and p[0] == ";":
-                    p = p[1:]
-                pieces.append(p.strip().split(kvsep))
-                key_vals = [(p[0], " ".join(p[1:])) for p in pieces]
+    parts = keyval_str.split(dialect["field separator"])
 
-        if dialect["fmt"] == "gff3":
-            key_vals = [p.split(kvsep) for p in parts]
-        else:
-            leadingsemicolon = dialect["leading semicolon"]
-            pieces = []
-            for i, p in enumerate(parts):
-                if i == 0 and leadingsemicolon:
-                    p = p[1:]
-                pieces.append(p.strip().split(kvsep))
-                key_vals = [(p[0], " ".join(p[1:])) for p in pieces]
-
-        quoted = dialect["quoted GFF2 values"]
-        for item in key_vals:
-            # Easy if it follows spec
-            if len(item) == 2:
-                key, val = item
-
-            # Only key provided?
-            elif len(item) == 1:
-                key = item[0]
-                val = ""
+    if strip and dialect["leading semicolon"]:
+        parts[0] = parts[0][1:]
 
-            else:
-                key = item[0]
-                val = dialect["keyval separator"].join(item[1:])
-
-            try:
-                quals[key]
-            except KeyError:
-                quals[key] = []
-
-            if quoted:
-                if len(val) > 0 and val[0] == '"' and val[-1] == '"':
-                    val = val[1:-1]
-
-            if val:
-                # TODO: if there are extra commas for a value, just use empty
-                # strings
-                # quals[key].extend([v for v in val.split(',') if v])
-                vals = val.split(",")
-                quals[key].extend(vals)
+    # Single pass over the fields. Partitioning on the first key/val separator
+    # handles keys with no value and values that themselves contain the
+    # separator, e.g.
+    #
+    #  Note=marker name(s): T0028 SGN-M1347 |identity=99.58|escore=2e-126
+    #
+    # without the special-casing that splitting on every separator would need.
+    for p in parts:
+        if strip:
+            p = p.strip()
+        key, _, val = p.partition(kvsep)
 
-        quals = _unquote_quals(quals, dialect)
-        return quals, dialect
+        if key not in quals:
+            quals[key] = []
+
+        if quoted and val[:1] == '"' and val[-1:] == '"':
+            val = val[1:-1]
+
+        if val:
+            # TODO: if there are extra commas for a value, just use empty
+            # strings
+            # quals[key].extend([v for v in val.split(',') if v])
+            quals[key].extend(val.split(","))
+
+    quals = _unquote_quals(keyval_str, quals, dialect)
+    return quals, dialect
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _infer_keyvals(keyval_str, ignore_url_escape_characters):
+    """
+    Infers the dialect of a non-empty attributes string and splits it.
+
+    Returns the attributes and dialect in immutable form, as a tuple of (key,
+    tuple-of-values) pairs and a tuple of dialect items (with "order" as
+    a tuple), so they can be safely cached. `ignore_url_escape_characters` is
+    only used as part of the cache key, so that changing
+    `constants.ignore_url_escape_characters` does not return stale results.
+    """
+    dialect = copy.copy(constants.dialect)
+    quals = {}
 
-    # If we got here, then we need to infer the dialect....
-    #
     # Reset the order to an empty list so that it will only be populated with
     # keys that are found in the file.
     dialect["order"] = []
@@ -371,5 +388,9 @@ def _split_keyvals(keyval_str, dialect=None):
     if (dialect["keyval separator"] == " ") and (dialect["quoted GFF2 values"]):
         dialect["fmt"] = "gtf"
 
-    quals = _unquote_quals(quals, dialect)
-    return quals, dialect
+    quals = _unquote_quals(keyval_str, quals, dialect)
+    dialect["order"] = tuple(dialect["order"])
+    return (
+        tuple((key, tuple(vals)) for key, vals in quals.items()),
+        tuple(dialect.items()),
+    )
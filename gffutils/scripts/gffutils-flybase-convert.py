@@ -1,8 +1,10 @@
 #!/usr/bin/env python
 
 import os
+import json
 import logging
-from collections import Counter
+import itertools
+import multiprocessing
 import gffutils
 from gffutils.create import logger
 
@@ -18,35 +20,217 @@ usage = """
 
 def read_ignore_list(fn):
     """
-    Converts a file into a list
+    Converts a file into a set of lines, ignoring comments
     """
-    return [i.strip() for i in open(fn) if not i.startswith("#")]
+    # These are small, so read in one go rather than line by line
+    with open(fn) as fh:
+        lines = fh.read().splitlines()
+    return frozenset(i.strip() for i in lines if i and not i.startswith("#"))
+
+
+def _filter_features(features, add_chr, chroms_to_ignore, featuretypes_to_ignore):
+    """
+    Yields features not on unwanted chromosomes and not of unwanted
+    featuretypes, optionally adding "chr" to chrom names.
+    """
+    for i in features:
+        if add_chr:
+            i.chrom = "chr" + i.chrom
+
+        if i.chrom in chroms_to_ignore:
+            continue
+
+        if i.featuretype in featuretypes_to_ignore:
+            continue
+        yield i
+
+
+def _cleaned_chunks(features, bufsize=1 << 20):
+    """
+    Yields `features` as encoded, newline-terminated chunks of roughly
+    `bufsize` bytes, so output can be written in large blocks rather than line
+    by line.
+    """
+    buf = bytearray()
+    for i in features:
+        buf += str(i).encode("utf-8")
+        buf += b"\n"
+        if len(buf) >= bufsize:
+            yield bytes(buf)
+            buf.clear()
+    yield bytes(buf)
+
+
+def iter_clean(gff, add_chr=False, chroms_to_ignore=None, featuretypes_to_ignore=None):
+    """
+    Like clean_gff, but yields the cleaned features instead of writing them to
+    a file.  These can be passed straight to gffutils.create_db, avoiding
+    writing out the cleaned file and then parsing it all over again.
+    """
+    return _filter_features(
+        gffutils.iterators.DataIterator(gff),
+        add_chr,
+        frozenset(chroms_to_ignore or ()),
+        frozenset(featuretypes_to_ignore or ()),
+    )
+
+
+def _chrom_ranges(fn, maxsize=1 << 24):
+    """
+    Returns a list of (start, end) byte offsets into `fn`, one for each run of
+    consecutive lines on the same chromosome.  Runs larger than `maxsize`
+    bytes are split further (on line boundaries) so that work is still spread
+    out when there are only a few large chromosomes.  Scanning stops at any
+    FASTA section.
+    """
+    ranges = []
+    chrom = None
+    start = offset = 0
+    with open(fn, "rb") as fh:
+        for line in fh:
+            if line.startswith((b"##FASTA", b">")):
+                break
+            if not line.startswith(b"#") and line.strip():
+                this_chrom = line.split(b"\t", 1)[0]
+                if this_chrom != chrom or offset - start >= maxsize:
+                    if chrom is not None:
+                        ranges.append((start, offset))
+                    chrom = this_chrom
+                    start = offset
+            offset += len(line)
+    if chrom is not None:
+        ranges.append((start, offset))
+    return ranges
+
+
+def _clean_range(args):
+    """
+    Worker for clean_gff: parses and filters one byte range of the file.
+    """
+    fn, start, end, dialect, add_chr, chroms_to_ignore, featuretypes_to_ignore = args
+    with open(fn, "rb") as fh:
+        fh.seek(start)
+        data = fh.read(end - start).decode("utf-8")
+
+    # Split on newlines and drop any "\r" before them, like the
+    # single-process path. splitlines() would also split on characters such
+    # as "\x0c" or "\u2028", which may appear inside attribute values.
+    lines = (line.rstrip("\r") for line in data.split("\n"))
+    features = (
+        gffutils.feature.feature_from_line(line, dialect=dialect)
+        for line in lines
+        if line and not line.startswith("#")
+    )
+    return b"".join(
+        _cleaned_chunks(
+            _filter_features(
+                features, add_chr, chroms_to_ignore, featuretypes_to_ignore
+            )
+        )
+    )
 
 
 def clean_gff(
-    gff, cleaned, add_chr=False, chroms_to_ignore=None, featuretypes_to_ignore=None
+    gff,
+    cleaned,
+    add_chr=False,
+    chroms_to_ignore=None,
+    featuretypes_to_ignore=None,
+    processes=1,
 ):
     """
     Cleans a GFF file by removing features on unwanted chromosomes and of
     unwanted featuretypes.  Optionally adds "chr" to chrom names.
+
+    If `processes` > 1, each chromosome's block of lines is cleaned in
+    a separate process and the results are concatenated in the original
+    order.  This is not supported for gzipped files, which are cleaned in
+    a single process.
     """
     logger.info("Cleaning GFF")
-    chroms_to_ignore = chroms_to_ignore or []
-    featuretypes_to_ignore = featuretypes_to_ignore or []
-    with open(cleaned, "w") as fout:
-        for i in gffutils.iterators.DataIterator(gff):
-            if add_chr:
-                i.chrom = "chr" + i.chrom
-
-            if i.chrom in chroms_to_ignore:
-                continue
-
-            if i.featuretype in featuretypes_to_ignore:
-                continue
-            fout.write(str(i) + "\n")
+    chroms_to_ignore = frozenset(chroms_to_ignore or ())
+    featuretypes_to_ignore = frozenset(featuretypes_to_ignore or ())
+
+    if processes > 1 and gff.endswith(".gz"):
+        logger.warning("Cannot split gzipped input; using a single process")
+        processes = 1
+
+    with open(cleaned, "wb") as fout:
+        if processes > 1:
+            # Only peeks at the first few lines to get the dialect
+            dialect = gffutils.iterators.DataIterator(gff).dialect
+            jobs = [
+                (
+                    gff,
+                    start,
+                    end,
+                    dialect,
+                    add_chr,
+                    chroms_to_ignore,
+                    featuretypes_to_ignore,
+                )
+                for start, end in _chrom_ranges(gff)
+            ]
+            with multiprocessing.Pool(processes) as pool:
+                for chunk in pool.imap(_clean_range, jobs):
+                    fout.write(chunk)
+        else:
+            for chunk in _cleaned_chunks(
+                iter_clean(gff, add_chr, chroms_to_ignore, featuretypes_to_ignore)
+            ):
+                fout.write(chunk)
     return cleaned
 
 
+# Walks gene -> transcript -> exon/CDS in one pass over the db, rather than
+# issuing a children() query for every gene and every transcript.
+_export_query = """
+    SELECT
+        g.id AS gene_id, g.start AS gene_start, g.end AS gene_end,
+        g.attributes AS gene_attributes,
+        t.id AS transcript_id, t.featuretype AS transcript_type,
+        {0}
+    FROM features g
+    JOIN relations r1 ON r1.parent = g.id AND r1.level = 1
+    JOIN features t ON t.id = r1.child
+    JOIN relations r2 ON r2.parent = t.id AND r2.level = 1
+    JOIN features c ON c.id = r2.child
+    WHERE g.featuretype = 'gene' AND c.featuretype IN ('exon', 'CDS')
+    ORDER BY g.id, t.id, c.start
+""".format(", ".join("c." + k for k in gffutils.constants._keys))
+
+
+def iter_gene_exons(db, chunksize=10000):
+    """
+    Yields a (gene, exons) tuple for each gene that has exons or CDSs.
+
+    `gene` is a dict with the gene's "id", "start", "end", and "Name";
+    `exons` is a list of (feature, transcript_id, transcript_type) tuples.
+    """
+    c = db.execute(_export_query)
+    rows = itertools.chain.from_iterable(iter(lambda: c.fetchmany(chunksize), []))
+    for gene_id, group in itertools.groupby(rows, key=lambda r: r["gene_id"]):
+        exons = []
+        for row in group:
+            exons.append(
+                (
+                    gffutils.Feature(
+                        dialect=db.dialect,
+                        **{k: row[k] for k in gffutils.constants._keys},
+                    ),
+                    row["transcript_id"],
+                    row["transcript_type"],
+                )
+            )
+        gene = {
+            "id": gene_id,
+            "start": row["gene_start"],
+            "end": row["gene_end"],
+            "Name": json.loads(row["gene_attributes"])["Name"][0],
+        }
+        yield gene, exons
+
+
 if __name__ == "__main__":
 
     import argparse
@@ -107,71 +291,87 @@ if __name__ == "__main__":
                     annotations are correct and make no changes to the exported
                     exons""",
     )
+    ap.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="""Number of processes to use
+                    when cleaning the GFF file, splitting the work by
+                    chromosome.  If more than 1, the cleaned GFF is written
+                    next to the input with a ".cleaned" suffix and the
+                    database is created from that; otherwise cleaned features
+                    are passed directly to the database without writing an
+                    intermediate file.  Not supported for gzipped files.""",
+    )
     args = ap.parse_args()
 
     if args.gff:
-        chroms_to_ignore = []
+        chroms_to_ignore = frozenset()
         if args.chrom_ignore:
             chroms_to_ignore = read_ignore_list(args.chrom_ignore)
 
-        featuretypes_to_ignore = []
+        featuretypes_to_ignore = frozenset()
         if args.featuretype_ignore:
             featuretypes_to_ignore = read_ignore_list(args.featuretype_ignore)
 
-        cleaned = clean_gff(
-            args.gff,
-            args.gff + ".cleaned",
-            add_chr=args.add_chr,
-            chroms_to_ignore=chroms_to_ignore,
-            featuretypes_to_ignore=featuretypes_to_ignore,
-        )
-
-        db = gffutils.create_db(
-            args.gff + ".cleaned", args.db, verbose=True, id_spec=["ID"], force=True
-        )
+        if args.processes > 1:
+            # Cleaning in parallel writes a cleaned file, which the db is then
+            # created from.
+            data = clean_gff(
+                args.gff,
+                args.gff + ".cleaned",
+                add_chr=args.add_chr,
+                chroms_to_ignore=chroms_to_ignore,
+                featuretypes_to_ignore=featuretypes_to_ignore,
+                processes=args.processes,
+            )
+        else:
+            logger.info("Cleaning GFF")
+            data = iter_clean(
+                args.gff,
+                add_chr=args.add_chr,
+                chroms_to_ignore=chroms_to_ignore,
+                featuretypes_to_ignore=featuretypes_to_ignore,
+            )
 
-    db = gffutils.FeatureDB(args.db)
+        db = gffutils.create_db(data, args.db, verbose=True, id_spec=["ID"], force=True)
+    else:
+        db = gffutils.FeatureDB(args.db)
 
     logger.info("Creating GTF file")
     with open(args.gtf, "w") as fout:
-        for gene in db.features_of_type("gene"):
-            gene_id = gene.id
-            transcripts = []
-            exons = []
-            for child in db.children(gene, level=1):
-                transcript_id = child.id
-                transcripts.append(child)
-                for grandchild in db.children(child, level=1):
-                    if grandchild.featuretype not in ["exon", "CDS"]:
-                        continue
-                    exons.append(grandchild)
+        for gene, exons in iter_gene_exons(db):
+            gene_id = gene["id"]
 
             if args.fix_strand:
-                c = Counter([i.strand for i in exons])
+                strands = [i.strand for i, _, _ in exons]
+                # In order of first appearance, so that ties go to the
+                # first-seen strand as Counter.most_common() did.
+                distinct = dict.fromkeys(strands)
 
-                if len(c) > 1:
+                if len(distinct) > 1:
                     # Exons have inconsistent strands.  So assume the most
                     # common strand is the "true" strand to use.
-                    most_common = c.most_common()
-                    new_strand = most_common[0][0]
+                    new_strand = max(distinct, key=strands.count)
                     logger.warning(
                         "Gene %s has inconsistent strands: %s.  "
                         'Changing all exons to "%s" strand'
-                        % (gene_id, most_common, new_strand)
+                        % (
+                            gene_id,
+                            {i: strands.count(i) for i in distinct},
+                            new_strand,
+                        )
                     )
-                    new_exons = []
-                    for exon in exons:
+                    for exon, _, _ in exons:
                         exon.strand = new_strand
-                        new_exons.append(exon)
-                    exons = new_exons
 
             if args.fix_extent:
                 if len(exons) > 0:
                     exon_extent = [
-                        min(i.start for i in exons),
-                        max(i.stop for i in exons),
+                        min(i.start for i, _, _ in exons),
+                        max(i.stop for i, _, _ in exons),
                     ]
-                    gene_extent = [gene.start, gene.stop]
+                    gene_extent = [gene["start"], gene["end"]]
                     if exon_extent != gene_extent:
                         logger.warning(
                             "Exons of gene %s do not match gene annotation. "
@@ -180,22 +380,38 @@ if __name__ == "__main__":
                         )
 
                     if args.fix_extent == "gene":
-                        new_exons = sorted(exons, key=lambda x: x.start)
-                        new_exons[0].start = gene.start
-                        new_exons[-1].stop = gene.stop
-                        exons = new_exons
-
-            for exon in exons:
-                fields = str(grandchild).split("\t")[:-1]
-                attributes = (
-                    'gene_id "{0}"; transcript_id "{1}"; '
-                    'gene_name "{2}" transcript_type="{3}"'
-                ).format(
-                    gene_id,
-                    transcript_id,
-                    gene.attributes["Name"][0],
-                    child.featuretype,
-                )
-                fields.append(attributes)
-                fout.write("\t".join(fields) + "\n")
+                        exons = sorted(exons, key=lambda x: x[0].start)
+                        exons[0][0].start = gene["start"]
+                        exons[-1][0].stop = gene["end"]
+
+            # The attributes only depend on the gene and transcript, so build
+            # them once per transcript rather than once per exon.
+            gene_name = gene["Name"]
+            transcript_attributes = {}
+            lines = []
+            for exon, transcript_id, transcript_type in exons:
+                attributes = transcript_attributes.get(transcript_id)
+                if attributes is None:
+                    attributes = (
+                        f'gene_id "{gene_id}"; transcript_id "{transcript_id}"; '
+                        f'gene_name "{gene_name}"; '
+                        f'transcript_type "{transcript_type}";'
+                    )
+                    transcript_attributes[transcript_id] = attributes
+
+                # Build the first 8 fields directly; str(exon) would
+                # reconstruct its attributes only for them to be discarded.
+                fields = [
+                    exon.seqid,
+                    exon.source,
+                    exon.featuretype,
+                    str(exon.start),
+                    str(exon.end),
+                    exon.score,
+                    exon.strand,
+                    exon.frame,
+                    attributes,
+                ]
+                lines.append("\t".join(fields) + "\n")
+            fout.writelines(lines)
     logger.info("Wrote %s" % args.gtf)
@@ -1,10 +1,37 @@
+import copy
+
+import pytest
+
 from gffutils import parser, feature, helpers, constants
 
 
-def test_feature_from_line():
+@pytest.fixture(scope="module")
+def exon_line():
+    return "chr2L	FlyBase	exon	7529	8116	.	+	.	Name=CG11023:1;Parent=FBtr0300689,FBtr0300690"
+
+
+@pytest.fixture(scope="module")
+def exon_feature(exon_line):
+    # Parsed once for the whole module; tests that modify the feature should
+    # work on a copy.
+    return feature.feature_from_line(exon_line, keep_order=True)
+
+
+@pytest.fixture(scope="module")
+def extra_line(exon_line):
+    # Same exon, with fields past the ninth (stored in Feature.extra)
+    return exon_line + "\tsome\tmore\tstuff"
+
+
+@pytest.fixture(scope="module")
+def extra_feature(extra_line):
+    return feature.feature_from_line(extra_line, keep_order=True)
+
+
+def test_feature_from_line(exon_line):
     # spaces and tabs should give identical results
-    line1 = "chr2L	FlyBase	exon	7529	8116	.	+	.	Name=CG11023:1;Parent=FBtr0300689,FBtr0300690"
-    line2 = "chr2L FlyBase exon 7529 8116 . + . Name=CG11023:1;Parent=FBtr0300689,FBtr0300690"
+    line1 = exon_line
+    line2 = exon_line.replace("\t", " ")
     assert feature.feature_from_line(
         line1, strict=False, keep_order=True
     ) == feature.feature_from_line(line2, strict=False, keep_order=True)
@@ -42,9 +69,8 @@ def test_default_start_stop():
     assert str(f) == ".	.	.	0	0	.	.	.	", str(f)
 
 
-def test_aliases():
-    line = "chr2L	FlyBase	exon	7529	8116	.	+	.	Name=CG11023:1;Parent=FBtr0300689,FBtr0300690"
-    f = feature.feature_from_line(line, keep_order=True)
+def test_aliases(exon_feature):
+    f = copy.copy(exon_feature)
     assert f.chrom == "chr2L" == f.seqid
     assert f.end == 8116 == f.stop
 
@@ -54,23 +80,18 @@ def test_aliases():
     assert f.stop == 1 == f.end
 
 
-def test_string_representation():
-    line = "chr2L	FlyBase	exon	7529	8116	.	+	.	Name=CG11023:1;Parent=FBtr0300689,FBtr0300690"
-    f = feature.feature_from_line(line, keep_order=True)
-    assert line == str(f), str(f)
+def test_string_representation(exon_line, exon_feature, extra_line, extra_feature):
+    assert exon_line == str(exon_feature), str(exon_feature)
+    assert extra_line == str(extra_feature), str(extra_feature)
 
-    line = "chr2L	FlyBase	exon	7529	8116	.	+	.	Name=CG11023:1;Parent=FBtr0300689,FBtr0300690	some	more	stuff"
-    f = feature.feature_from_line(line, keep_order=True)
-    assert line == str(f)
 
+@pytest.fixture(scope="module")
+def pybedtools():
+    return pytest.importorskip("pybedtools", reason="pybedtools not installed")
 
-def test_pbt_interval_conversion():
-    try:
-        import pybedtools
-    except ImportError:
-        return
-    line = "chr2L FlyBase exon 7529 8116 . + . Name=CG11023:1;Parent=FBtr0300689,FBtr0300690"
-    f = feature.feature_from_line(line, strict=False, keep_order=True)
+
+def test_pbt_interval_conversion(pybedtools, exon_feature):
+    f = exon_feature
     pbt = helpers.asinterval(f)
     assert pbt.chrom == f.chrom == f.seqid
     assert pbt.start == f.start - 1
@@ -80,17 +101,25 @@ def test_pbt_interval_conversion():
     assert pn == fn, "%s, %s" % (pn, fn)
 
 
-def test_hash():
-    line = "chr2L	FlyBase	exon	7529	8116	.	+	.	Name=CG11023:1;Parent=FBtr0300689,FBtr0300690	some	more	stuff"
-    f = feature.feature_from_line(line, keep_order=True)
+@pytest.mark.parametrize("which", ["exon", "extra"])
+def test_hash(request, which):
+    line = request.getfixturevalue(which + "_line")
+    f = request.getfixturevalue(which + "_feature")
     assert hash(f) == hash(line)
+    assert f == f
+    assert not (f != f)
+
+
+def test_extra(exon_feature, extra_feature):
+    assert exon_feature.extra == []
+    assert extra_feature.extra == ["some", "more", "stuff"]
+    assert extra_feature != exon_feature
 
 
-def test_repr():
-    line = "chr2L	FlyBase	exon	7529	8116	.	+	.	Name=CG11023:1;Parent=FBtr0300689,FBtr0300690	some	more	stuff"
-    f = feature.feature_from_line(line, keep_order=True)
-    print(repr(f))
-    print(hex(id(f)))
+@pytest.mark.parametrize("which", ["exon", "extra"])
+def test_repr(request, which):
+    f = request.getfixturevalue(which + "_feature")
+    assert repr(f).startswith("<Feature exon (chr2L:7529-8116[+]) at 0x")
     assert repr(f) == ("<Feature exon (chr2L:7529-8116[+]) at %s>" % hex(id(f)))
 
 
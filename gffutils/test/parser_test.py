@@ -43,7 +43,11 @@ def test_directives():
     assert db.directives == ["directive1 example"], db.directives
 
 
-@pytest.mark.parametrize("item", attr_test_cases.attrs)
+@pytest.mark.parametrize(
+    "item",
+    attr_test_cases.attrs,
+    ids=["attrs%d" % i for i in range(len(attr_test_cases.attrs))],
+)
 def test_attrs_OK(item):
     """
     Given an attribute string and a dictionary of what you expect, test the
@@ -65,7 +69,7 @@ def test_attrs_OK(item):
         assert reconstructed == attr_str, reconstructed
 
 
-def parser_smoke_test():
+def test_parser_smoke():
     """
     Just confirm we can iterate completely through the test files....
     """
@@ -156,3 +160,32 @@ def test_attributes():
     f = feature.feature_from_line(s)
     f.keep_order = True
     assert str(f) == s, str(f)
+
+
+def test_split_keyvals_known_dialect():
+    # Passing in the dialect should give the same attributes as inferring it,
+    # for repeated keys, "=" in values, keys without values, and escaped
+    # characters.
+    s = "ID=a;Note=x=y,z;flag;Alias=%3B1;ID=b"
+    inferred, dialect = parser._split_keyvals(s)
+    known, _ = parser._split_keyvals(s, dialect=dialect)
+    assert known == {
+        "ID": ["a", "b"],
+        "Note": ["x=y", "z"],
+        "flag": [],
+        "Alias": [";1"],
+    }
+    assert known == inferred
+
+
+def test_inferred_keyvals_are_copies():
+    # Dialect inference is cached, so make sure callers get their own objects
+    s = 'gene_id "g1"; transcript_id "t1";'
+    attrs1, dialect1 = parser._split_keyvals(s)
+    attrs1["gene_id"].append("x")
+    dialect1["order"].append("x")
+    dialect1["fmt"] = "x"
+    attrs2, dialect2 = parser._split_keyvals(s)
+    assert attrs2["gene_id"] == ["g1"]
+    assert dialect2["order"] == ["gene_id", "transcript_id"]
+    assert dialect2["fmt"] == "gtf"
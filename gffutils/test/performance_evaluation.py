@@ -10,10 +10,9 @@ WARNING: These tests can take about 1.5 hours to run!
 Download required annotation files by running
 gffutils/test/data/download-large-annotation-files.sh
 """
-import tempfile
 import random
+import sqlite3
 import unittest
-import os
 
 import pytest
 
@@ -41,6 +40,9 @@ class PerformanceTestFeatureDB(object):
     # each line is transcript_id
     transcript_list = None
 
+    # if not None, a copy of the in-memory database is saved to this file
+    dbfilename = None
+
     # these args are passed to gffutils.create_db
     # can be overrided in subclasses
     create_db_kwargs = {
@@ -54,35 +56,55 @@ class PerformanceTestFeatureDB(object):
         """
         Prepearing for all tests.
         """
-        dbfile_handle, cls.dbfilename = tempfile.mkstemp(suffix=".db", prefix="test")
-        os.close(dbfile_handle)
+        # None of the tests need the database to persist, so build it in
+        # memory. Building it is only setup here (test_make_db measures that),
+        # so also use the write-optimized pragmas.
+        kwargs = dict(cls.create_db_kwargs)
+        kwargs.setdefault("optimize_for", "write")
         # The annotation files are large so they are not inclided in repo,
         # download it manualy with
         # gffutils/test/data/download-large-annotation-files.sh
         try:
-            gffutils.create_db(cls.gff_file, cls.dbfilename, **cls.create_db_kwargs)
+            cls.db = gffutils.create_db(cls.gff_file, ":memory:", **kwargs)
         except ValueError:
             raise EnvironmentError(
                 "Annotation files not found. Download them manualy by "
                 "running "
                 "gffutils/test/data/download-large-annotation-files.sh"
             )
-        cls.db = gffutils.FeatureDB(cls.dbfilename)
+
+        # Optionally keep a copy on disk, e.g. to inspect it afterwards
+        if cls.dbfilename is not None:
+            disk_conn = sqlite3.connect(cls.dbfilename)
+            cls.db.conn.backup(disk_conn)
+            disk_conn.close()
 
         # Chromosome sizes for testing fetching features from regions
-        cls.chromosome_sizes = {}
         with open(cls.chromsizes_file) as chromosome_sizes:
-            for chromosome_size in chromosome_sizes:
-                chromosome, size = chromosome_size.split()
-                size = int(size)
-                cls.chromosome_sizes[chromosome] = size
+            fields = chromosome_sizes.read().split()
+        cls.chromosome_sizes = dict(zip(fields[::2], map(int, fields[1::2])))
+
+        # Ids to look up, shared by the tests that need them
+        with open(cls.gene_list) as gene_list:
+            cls.gene_ids = tuple(gene_list.read().split())
+        with open(cls.transcript_list) as transcript_list:
+            cls.transcript_ids = tuple(transcript_list.read().split())
+
+        # Random regions shared by all the region tests, so they all query the
+        # same workload. Chromosomes are sorted so the regions are
+        # reproducible for the seed, and are picked with probability
+        # proportional to their size.
         random.seed(1842346386)
+        chromosomes = sorted(cls.chromosome_sizes)
+        sizes = [cls.chromosome_sizes[chromosome] for chromosome in chromosomes]
+        cls.random_regions = []
+        for chromosome in random.choices(chromosomes, weights=sizes, k=2000):
+            size = cls.chromosome_sizes[chromosome]
+            start = random.randint(1, size)
+            end = random.randint(start, size)
+            cls.random_regions.append((chromosome, start, end))
         print("Preparation finished")
 
-    @classmethod
-    def tearDownClass(cls):
-        os.remove(cls.dbfilename)
-
     def test_make_db(self):
         """
         Measure time of creating new FeatureDB.
@@ -99,50 +121,57 @@ class PerformanceTestFeatureDB(object):
 
     def test_find_genes(self):
         """
-        Given a gene id find its features in db.
+        Given a gene id find its features in db, one lookup at a time.
         """
-        with open(self.gene_list) as gene_list:
-            for gene_id in gene_list:
-                gene_id = gene_id.strip()
-                dummy_gene_from_db = self.db[gene_id]
+        for gene_id in self.gene_ids:
+            dummy_gene_from_db = self.db[gene_id]
+
+    def test_find_genes_bulk(self):
+        """
+        Same as test_find_genes, but looking up all the ids at once with
+        features_by_id.
+        """
+        for dummy_gene_from_db in self.db.features_by_id(self.gene_ids):
+            pass
+
+    def test_check_genes(self):
+        """
+        Given a gene id check that it is in the db.
+        """
+        for gene_id in self.gene_ids:
+            assert gene_id in self.db
 
     def test_find_trainscripts(self):
         """
         Given a transcript find the gene it belongs to.
         """
-        found_parent = False
-        with open(self.transcript_list) as transript_list:
-            for transcript in transript_list:
-                transcript = transcript.strip()
-                found_parent = False
-                for dummy_gene in self.db.parents(
-                    transcript,
-                    featuretype=(
-                        "gene",
-                        "tRNA_gene",
-                        "snoRNA_gene",
-                        "snRNA_gene",
-                        "ncRNA_gene",
-                        "rRNA_gene",
-                        "pseudogene",
-                    ),
-                ):
-                    found_parent = True
-                assert found_parent, (
-                    "parent gene not found for transcript %s " % transcript
-                )
-        assert found_parent, "No single parent gene found"
+        found_parents = set()
+        for transcript, dummy_gene in self.db.parents_bulk(
+            self.transcript_ids,
+            featuretype=(
+                "gene",
+                "tRNA_gene",
+                "snoRNA_gene",
+                "snRNA_gene",
+                "ncRNA_gene",
+                "rRNA_gene",
+                "pseudogene",
+            ),
+        ):
+            found_parents.add(transcript)
+        for transcript in self.transcript_ids:
+            assert transcript in found_parents, (
+                "parent gene not found for transcript %s " % transcript
+            )
+        assert found_parents, "No single parent gene found"
 
     def region_fetch_helper(self, number_of_repeats, strand=None, featuretype=None):
         """
-        Helper for fetching features from random region number_of_repeats
-        times.
+        Helper for fetching features from the first number_of_repeats random
+        regions.
         """
         fetched_at_least_one = False
-        for dummy_repeat in range(number_of_repeats):
-            chromosome, size = random.choice(self.chromosome_sizes.items())
-            start = random.randint(1, size)
-            end = random.randint(start, size)
+        for chromosome, start, end in self.random_regions[:number_of_repeats]:
             for dummy_feature in self.db.region(
                 seqid=chromosome,
                 start=start,
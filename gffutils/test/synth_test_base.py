@@ -1,3 +1,4 @@
+import sqlite3
 from unittest import TestCase
 import gffutils
 
@@ -7,10 +8,22 @@ num_synthetic_overlap = 13
 
 
 class TestWithSynthDB(TestCase):
-    def setUp(self):
-        self.db = gffutils.create_db(
+    @classmethod
+    def setUpClass(cls):
+        # Only build the database once per class; each test gets its own copy
+        # of it in setUp so changes made by one test don't affect the others.
+        cls._template = gffutils.create_db(
             synthetic_path, ":memory:", merge_strategy="create_unique"
-        )  # type: gffutils.FeatureDB
+        ).conn
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._template.close()
+
+    def setUp(self):
+        conn = sqlite3.connect(":memory:")
+        self._template.backup(conn)
+        self.db = gffutils.FeatureDB(conn)  # type: gffutils.FeatureDB
         self.assertEqual(num_synthetic_features, self.db.count_features_of_type())
 
     def _dump_db(self):
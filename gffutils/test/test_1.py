@@ -20,6 +20,7 @@ else:
     import SocketServer
 
 import multiprocessing
+import collections
 import json
 import difflib
 
@@ -192,7 +193,10 @@ class BaseDB(object):
 
     orig_fn = None
 
-    def setup_method(self):
+    # None of the tests modify the database, so it is only built once per
+    # class.
+    @classmethod
+    def setup_class(cls):
         def gff_id_func(f):
             if "ID" in f.attributes:
                 return f.attributes["ID"][0]
@@ -215,22 +219,45 @@ class BaseDB(object):
                     f
                 )
 
-        if self.orig_fn.endswith(".gtf"):
+        if cls.orig_fn.endswith(".gtf"):
             id_func = gtf_id_func
-        if self.orig_fn.endswith(".gff"):
+        if cls.orig_fn.endswith(".gff"):
             id_func = gff_id_func
-        self.db = create.create_db(
-            self.orig_fn,
+        cls.db = create.create_db(
+            cls.orig_fn,
             ":memory:",
             id_spec=id_func,
             merge_strategy="create_unique",
             verbose=False,
             keep_order=True,
         )
-        self.c = self.db.conn.cursor()
-        self.dialect = self.db.dialect
+        cls.c = cls.db.conn.cursor()
+        cls.dialect = cls.db.dialect
 
-    def table_test(self):
+        # Count each featuretype with a single GROUP BY query, for _count1
+        cls.sql_counts = dict(
+            cls.c.execute(
+                "select featuretype, count() from features group by featuretype"
+            )
+        )
+
+        # Count the lines of each featuretype in a single pass over the file,
+        # for _count2.
+        cls.file_counts = collections.Counter()
+        with open(cls.orig_fn) as fh:
+            for line in fh:
+                if line.startswith("#"):
+                    continue
+
+                # Only the first three fields are needed
+                L = line.split("\t", 3)
+
+                if len(L) < 3:
+                    continue
+
+                cls.file_counts[L[2]] += 1
+
+    def test_table(self):
         expected_tables = [
             "features",
             "relations",
@@ -240,7 +267,6 @@ class BaseDB(object):
             "duplicates",
             "sqlite_stat1",
         ]
-        self.c.execute('select name from sqlite_master where type="table"')
         observed_tables = [
             i[0]
             for i in self.c.execute('select name from sqlite_master where type="table"')
@@ -249,26 +275,13 @@ class BaseDB(object):
 
     def _count1(self, featuretype):
         """Count using SQL"""
-        self.c.execute(
-            "select count() from features where featuretype = ?", (featuretype,)
-        )
-        results = self.c.fetchone()[0]
+        results = self.sql_counts.get(featuretype, 0)
         print('count1("%s") says: %s' % (featuretype, results))
         return results
 
     def _count2(self, featuretype):
         """Count GFF lines"""
-        cnt = 0
-        for line in open(self.orig_fn):
-            if line.startswith("#"):
-                continue
-            L = line.split()
-
-            if len(L) < 3:
-                continue
-
-            if L[2] == featuretype:
-                cnt += 1
+        cnt = self.file_counts[featuretype]
         print('count2("%s") says: %s' % (featuretype, cnt))
         return cnt
 
@@ -280,13 +293,11 @@ class BaseDB(object):
 
     def _count4(self, featuretype):
         """Count by iterating over all features of this type"""
-        cnt = 0
-        for i in self.db.features_of_type(featuretype):
-            cnt += 1
+        cnt = sum(1 for _ in self.db.features_of_type(featuretype))
         print('count4("%s") says: %s' % (featuretype, cnt))
         return cnt
 
-    def featurecount_test(self):
+    def test_featurecount(self):
         #  Right number of each featuretype, using multiple different ways of
         #  counting?
         print("format:", self.dialect["fmt"])
@@ -314,22 +325,24 @@ class BaseDB(object):
             parents2 = expected.GTF_parent_check_level_2
         return parents1, parents2
 
+    def _observed_parents(self, children, level):
+        # All of the parents in one query, as {child: set of parent IDs}
+        observed = dict((child, set()) for child in children)
+        for child, parent in self.db.parents_bulk(children, level=level):
+            observed[child].add(parent.id)
+        return observed
+
     def test_parents_level_1(self):
         parents1, parents2 = self._expected_parents()
+        observed = self._observed_parents(parents1, level=1)
         for child, expected_parents in parents1.items():
-            observed_parents = [i.id for i in self.db.parents(child, level=1)]
-            print("observed parents for %s:" % child, set(observed_parents))
-            print("expected parents for %s:" % child, set(expected_parents))
-            assert set(observed_parents) == set(expected_parents)
+            assert observed[child] == set(expected_parents), child
 
     def test_parents_level_2(self):
         parents1, parents2 = self._expected_parents()
+        observed = self._observed_parents(parents2, level=2)
         for child, expected_parents in parents2.items():
-            observed_parents = [i.id for i in self.db.parents(child, level=2)]
-            print(self.db[child])
-            print("observed parents for %s:" % child, set(observed_parents))
-            print("expected parents for %s:" % child, set(expected_parents))
-            assert set(observed_parents) == set(expected_parents)
+            assert observed[child] == set(expected_parents), child
 
     def test_bed12(self):
         if self.__class__ == TestGFFClass:
@@ -364,16 +377,14 @@ def test_random_chr():
     Test on GFF files with random chromosome events.
     """
     gff_fname = gffutils.example_filename("random-chr.gff")
-    db = helpers.get_gff_db(gff_fname)
+    db = helpers.get_gff_db(gff_fname, in_memory=True)
     # Test that we can get children of only a selected type
     gene_id = "chr1_random:165882:165969:-@chr1_random:137473:137600:-@chr1_random:97006:97527:-"
-    mRNAs = db.children(gene_id, featuretype="mRNA")
-    for mRNA_entry in mRNAs:
-        assert (
-            mRNA_entry.featuretype == "mRNA"
-        ), "Not all entries are of type mRNA! %s" % (
-            ",".join([entry.featuretype for entry in mRNAs])
-        )
+    featuretypes = [i.featuretype for i in db.children(gene_id, featuretype="mRNA")]
+    assert featuretypes, "No mRNAs found for %s" % gene_id
+    assert set(featuretypes) == {"mRNA"}, "Not all entries are of type mRNA! %s" % (
+        ",".join(featuretypes)
+    )
     print("Parsed random chromosome successfully.")
 
 
@@ -472,30 +483,27 @@ def test_sanitize_gff():
     # Get unsanitized GFF
     fn = gffutils.example_filename("unsanitized.gff")
     # Get its database
-    db = helpers.get_gff_db(fn)
+    db = helpers.get_gff_db(fn, in_memory=True)
     # Sanitize the GFF
     sanitized_recs = helpers.sanitize_gff_db(db)
     # Ensure that sanitization work, meaning all
-    # starts must be less than or equal to stops
-    for rec in sanitized_recs.all_features():
-        assert rec.start <= rec.stop, "Sanitization failed."
+    # starts must be less than or equal to stops. Checking in SQL avoids
+    # building every feature just to compare coordinates.
+    c = sanitized_recs.execute("SELECT id FROM features WHERE start > end")
+    unsanitized = [i[0] for i in c]
+    assert not unsanitized, "Sanitization failed: %s" % unsanitized
     print("Sanitized GFF successfully.")
 
 
-def test_region():
-
+@pytest.fixture(scope="module")
+def example_db():
     db_fname = gffutils.example_filename("FBgn0031208.gff")
-    db = gffutils.create_db(db_fname, ":memory:", keep_order=True)
+    return gffutils.create_db(db_fname, ":memory:", keep_order=True)
 
-    def _check(item):
-        kwargs, expected = item
-        try:
-            obs = list(db.region(**kwargs))
-            assert len(obs) == expected, "expected %s got %s" % (expected, len(obs))
-        except expected:
-            pass
 
-    regions = [
+@pytest.mark.parametrize(
+    "kwargs,expected",
+    [
         # previously failed, see issue #45
         (dict(seqid="chr2L", start=1, end=2e9, completely_within=True), 27),
         (dict(region="chr2L", start=0), ValueError),
@@ -530,10 +538,135 @@ def test_region():
         (dict(seqid="chr2L"), 27),
         # nonexistent
         (dict(region="nowhere"), 0),
+    ],
+)
+def test_region(example_db, kwargs, expected):
+    if isinstance(expected, type) and issubclass(expected, Exception):
+        with pytest.raises(expected):
+            list(example_db.region(**kwargs))
+    else:
+        obs = list(example_db.region(**kwargs))
+        assert len(obs) == expected, "expected %s got %s" % (expected, len(obs))
+
+
+def test_region_matches_overlap(example_db):
+    # Compare against checking each feature for overlap directly, for windows
+    # of different sizes (and so different bins) across the gene
+    features = list(example_db.all_features())
+    for start in range(7000, 13000, 250):
+        for size in (1, 10, 300, 3000):
+            end = start + size
+            obs = sorted(i.id for i in example_db.region(("chr2L", start, end)))
+            exp = sorted(
+                i.id for i in features if i.start <= end and i.end >= start
+            )
+            assert obs == exp, (start, end)
+
+
+def test_region_matches_overlap_at_bin_edges():
+    # Same as above, but with features and windows straddling the edges of
+    # the 128 kb, 1 Mb, and 8 Mb bins
+    edges = (1 << 17, 1 << 20, 1 << 23)
+    lines = ["chr1\tsrc\tgene\t100\t9000000\t.\t+\t.\tID=spans_all"]
+    for edge in edges:
+        for start in range(edge - 2, edge + 2):
+            for size in (0, 1, 2, 1000):
+                lines.append(
+                    "chr1\tsrc\tgene\t%d\t%d\t.\t+\t.\tID=f%d_%d"
+                    % (start, start + size, start, size)
+                )
+    db = gffutils.create_db("\n".join(lines), ":memory:", from_string=True)
+    features = list(db.all_features())
+    for edge in edges:
+        for start in list(range(edge - 3, edge + 3)) + [edge - 1000, edge - 1001]:
+            for size in (0, 1, 2, 1000):
+                end = start + size
+                obs = sorted(i.id for i in db.region(("chr1", start, end)))
+                exp = sorted(
+                    i.id for i in features if i.start <= end and i.end >= start
+                )
+                assert obs == exp, (start, end)
+
+
+def test_features_by_id(example_db):
+    ids = [i.id for i in example_db.all_features()]
+    ids = ids[::-1] + ids[:3]
+    found = list(example_db.features_by_id(ids, batchsize=4))
+    assert found == [example_db[i] for i in ids]
+    assert [i.id for i in found] == ids
+
+    with pytest.raises(gffutils.FeatureNotFoundError):
+        list(example_db.features_by_id(ids[:2] + ["nonexistent"]))
+
+
+def test_contains(example_db):
+    gene = example_db["FBgn0031208"]
+    assert "FBgn0031208" in example_db
+    assert gene in example_db
+    assert "nonexistent" not in example_db
+
+
+def test_feature_cache():
+    # Uses its own db, since it deletes a feature
+    db = gffutils.create_db(example_filename("FBgn0031208.gff"), ":memory:")
+    cached = gffutils.FeatureDB(db.conn, feature_cache_size=2)
+    ids = [i.id for i in db.features_of_type("exon")]
+
+    for i in ids + ids:
+        assert cached[i] == db[i]
+    assert list(cached._cache) == ids[-2:]
+
+    # Each lookup returns a new Feature, so changes don't leak into the cache
+    f = cached[ids[-1]]
+    f.attributes["new"] = ["changed"]
+    assert "new" not in cached[ids[-1]].attributes
+
+    # Modifying the database through the FeatureDB clears the cache
+    cached.delete(ids[-1], make_backup=False)
+    assert len(cached._cache) == 0
+    with pytest.raises(gffutils.FeatureNotFoundError):
+        cached[ids[-1]]
+
+
+def test_children_bulk(example_db):
+    ids = [i.id for i in example_db.features_of_type("mRNA")]
+    bulk = [(p, c.id) for p, c in example_db.children_bulk(ids, level=1, batchsize=1)]
+    expected = [(p, c.id) for p in ids for c in example_db.children(p, level=1)]
+    assert sorted(bulk) == sorted(expected)
+
+    exons = [c.id for p, c in example_db.children_bulk(ids, featuretype="exon")]
+    assert sorted(exons) == sorted(
+        c.id for p in ids for c in example_db.children(p, featuretype="exon")
+    )
+
+
+def test_parents_bulk(example_db):
+    ids = [i.id for i in example_db.features_of_type("exon")]
+    bulk = [(c, p.id) for c, p in example_db.parents_bulk(ids, level=1, batchsize=1)]
+    expected = [(c, p.id) for c in ids for p in example_db.parents(c, level=1)]
+    assert sorted(bulk) == sorted(expected)
+
+    genes = [p.id for c, p in example_db.parents_bulk(ids, featuretype="gene")]
+    assert sorted(genes) == sorted(
+        p.id for c in ids for p in example_db.parents(c, featuretype="gene")
+    )
+
+
+def test_children_of_type(example_db):
+    result = [(p, c.id) for p, c in example_db.children_of_type("gene", level=1)]
+    expected = [
+        (g.id, c.id)
+        for g in example_db.features_of_type("gene")
+        for c in example_db.children(g, level=1)
     ]
+    assert sorted(result) == sorted(expected)
 
-    for item in regions:
-        yield _check, item
+    exons = [c.id for p, c in example_db.children_of_type("gene", featuretype="exon")]
+    assert sorted(exons) == sorted(
+        c.id
+        for g in example_db.features_of_type("gene")
+        for c in example_db.children(g, featuretype="exon")
+    )
 
 
 def test_nonascii():
@@ -1157,6 +1290,98 @@ def test_for_analyze():
     os.unlink("deleteme")
 
 
+def test_optimize_for():
+    fn = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+    for optimize_for in ["write", "read", "balanced"]:
+        db = gffutils.create_db(
+            example_filename("FBgn0031208.gff"),
+            fn,
+            force=True,
+            optimize_for=optimize_for,
+        )
+        assert db.execute("PRAGMA journal_mode").fetchone()[0] == "memory"
+        assert db.execute("PRAGMA locking_mode").fetchone()[0] == "normal"
+
+        # The exclusive lock used while creating should have been released
+        db2 = gffutils.FeatureDB(fn)
+        assert len(list(db2.all_features())) == len(list(db.all_features()))
+        db2.conn.close()
+        db.conn.close()
+    os.unlink(fn)
+
+    with pytest.raises(ValueError):
+        gffutils.create_db(
+            example_filename("FBgn0031208.gff"), ":memory:", optimize_for="fast"
+        )
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        dict(optimize_for="write"),
+        dict(optimize_for="read"),
+        dict(optimize_for="balanced"),
+        dict(pragmas=dict(gffutils.constants.default_pragmas, journal_mode="OFF")),
+    ],
+    ids=["write", "read", "balanced", "journal_off"],
+)
+def test_duplicate_ids_in_batch(kwargs):
+    # Duplicate IDs must be handled the same with the presets, and without
+    # a journal.
+    data = "\n".join(
+        "chr1\t.\tgene\t%d\t%d\t.\t+\t.\tID=g%d" % (i * 10 + 1, i * 10 + 5, i)
+        for i in list(range(20)) + [3]
+    )
+    db = gffutils.create_db(
+        data, ":memory:", from_string=True, merge_strategy="create_unique", **kwargs
+    )
+    assert db.count_features_of_type() == 21
+    assert "g3_1" in db
+    with pytest.raises(ValueError, match="Duplicate ID g3$"):
+        gffutils.create_db(data, ":memory:", from_string=True, **kwargs)
+
+
+def test_repeated_ids():
+    # Ensembl/NCBI-style GFF3, where the CDS lines of a transcript share an ID.
+    # Repeated IDs are inserted one at a time, so check that they still get
+    # the right IDs and parents, both when creating and when updating.
+    lines = []
+    for t in range(3):
+        lines.append(
+            "chr1\t.\tmRNA\t%d\t%d\t.\t+\t.\tID=tx%d" % (t * 100 + 1, t * 100 + 90, t)
+        )
+        for e in range(4):
+            start = t * 100 + e * 20 + 1
+            lines.append(
+                "chr1\t.\tCDS\t%d\t%d\t.\t+\t0\tID=cds%d;Parent=tx%d"
+                % (start, start + 10, t, t)
+            )
+    data = "\n".join(lines)
+
+    db = gffutils.create_db(
+        data, ":memory:", from_string=True, merge_strategy="create_unique"
+    )
+    for t in range(3):
+        cds = sorted(i.id for i in db.children("tx%d" % t, featuretype="CDS"))
+        assert cds == ["cds%d" % t] + ["cds%d_%d" % (t, i) for i in range(1, 4)]
+    assert [i.start for i in db.features_of_type("CDS", order_by="rowid")] == [
+        t * 100 + e * 20 + 1 for t in range(3) for e in range(4)
+    ]
+
+    # "merge" keeps the same features, since their coordinates differ
+    merged = gffutils.create_db(
+        data, ":memory:", from_string=True, merge_strategy="merge"
+    )
+    assert sorted(i.id for i in merged.all_features()) == sorted(
+        i.id for i in db.all_features()
+    )
+
+    # Updating with the same lines again repeats every ID
+    db.update(data, from_string=True, merge_strategy="create_unique")
+    assert db.count_features_of_type("CDS") == 24
+    assert db.count_features_of_type("mRNA") == 6
+
+
 def test_sequence():
     fasta = gffutils.example_filename("dm6-chr2L.fa")
     f = feature.feature_from_line("chr2L	FlyBase	gene	154	170	.	+	.	ID=one;")
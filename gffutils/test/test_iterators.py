@@ -83,3 +83,18 @@ def test_string_iterator():
     db = gffutils.create_db(gtfdata, ":memory:", from_string=True)
     n = len(list(db.all_features()))
     assert n == 2, n
+
+
+def test_iter_with_progress():
+    for fn in ["FBgn0031208.gff", "gff_example1.gff3.gz"]:
+        it = gffutils.iterators.DataIterator(gffutils.example_filename(fn))
+        assert it.percent_done() is None
+        observed = list(it.iter_with_progress())
+        percents = [i[0] for i in observed]
+        assert percents == sorted(percents), percents
+        assert 0 < percents[-1] <= 100, percents
+        assert [i[1] for i in observed] == list(it)
+
+    # Features that are already in memory have no file to estimate from
+    it = gffutils.iterators.DataIterator(list(it))
+    assert [i[0] for i in it.iter_with_progress()] == [None] * len(observed)